@@ -4,11 +4,14 @@ Author: AI Assistant
 """
 
 import logging
+import asyncio
+import functools
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from config import OWNER_IDS
 from database import DatabaseManager
-from utils import format_admin_stats
+from utils import AsyncDBMixin, format_admin_stats
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -17,48 +20,164 @@ logger = logging.getLogger(__name__)
 WAITING_BIO = 1
 WAITING_BROADCAST = 2
 
-class AdminHandlers:
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
+# Telegram allows ~30 messages/second bot-wide
+BROADCAST_CONCURRENCY = 30
 
-    def is_owner_or_admin(self, user_id: int) -> bool:
-        """Check if user is owner or admin"""
-        return user_id in OWNER_IDS or self.db.is_admin(user_id)
+# Pre-built static keyboards, shared across callbacks to avoid rebuilding
+# the same button objects on every press
+_ACCESS_DENIED_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
+])
 
-    async def admin_panel_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Show admin panel"""
+_ADMIN_PANEL_ROWS = [
+    [InlineKeyboardButton("📝 Change Bio", callback_data="admin_change_bio")],
+    [InlineKeyboardButton("🛍️ Manage Products", callback_data="admin_manage_products")],
+    [InlineKeyboardButton("👥 User Management", callback_data="admin_user_management")],
+    [InlineKeyboardButton("📢 Broadcast Message", callback_data="admin_broadcast")],
+    [InlineKeyboardButton("⬅️ Back to Main", callback_data="back_to_main")]
+]
+
+_ADMIN_KB_ADMIN = InlineKeyboardMarkup(_ADMIN_PANEL_ROWS)
+_ADMIN_KB_OWNER = InlineKeyboardMarkup(
+    _ADMIN_PANEL_ROWS[:-1]
+    + [[InlineKeyboardButton("👤 Admin Management", callback_data="admin_manage_admins")]]
+    + _ADMIN_PANEL_ROWS[-1:]
+)
+
+_PRODUCT_MGMT_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 View All Products", callback_data="admin_view_products")],
+    [InlineKeyboardButton("➕ Add New Product", callback_data="admin_add_product")],
+    [InlineKeyboardButton("✏️ Edit Product", callback_data="admin_edit_product")],
+    [InlineKeyboardButton("🗑️ Delete Product", callback_data="admin_delete_product")],
+    [InlineKeyboardButton("⬅️ Back to Admin Panel", callback_data="admin_panel")]
+])
+
+_USER_MGMT_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("👥 View All Users", callback_data="admin_view_users")],
+    [InlineKeyboardButton("📊 User Statistics", callback_data="admin_user_stats")],
+    [InlineKeyboardButton("⬅️ Back to Admin Panel", callback_data="admin_panel")]
+])
+
+_BACK_TO_PRODUCTS_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⬅️ Back to Products", callback_data="admin_manage_products")]
+])
+
+_BACK_TO_USER_MGMT_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⬅️ Back to User Management", callback_data="admin_user_management")]
+])
+
+_CANCEL_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Cancel", callback_data="admin_panel")]
+])
+
+# Pre-formatted message templates; only the dynamic fields are filled per call
+_MANAGE_PRODUCTS_TMPL = (
+    "🛍️ *Product Management*\n\n"
+    "📊 Total Products: {n}\n\n"
+    "Choose an action:"
+)
+
+_USER_MGMT_TMPL = (
+    "👥 *User Management*\n\n"
+    "📊 Total Users: {n}\n\n"
+    "Choose an action:"
+)
+
+_BROADCAST_PROMPT_TMPL = (
+    "📢 *Broadcast Message*\n\n"
+    "👥 Total Users: {n}\n\n"
+    "Send your broadcast message below:\n"
+    "• Keep it clear and concise\n"
+    "• Use markdown formatting\n"
+    "• Include relevant information"
+)
+
+_BIO_PROMPT_PREFIX = "📝 *Change Bio Message*\n\n*Current Bio:*\n"
+_BIO_PROMPT_SUFFIX = (
+    "...\n\n"
+    "Send your new bio message below:\n"
+    "• Use markdown formatting\n"
+    "• Include emojis for engagement\n"
+    "• Keep it professional"
+)
+
+
+class TokenBucket:
+    """Simple token bucket limiting calls to `rate` per second"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def admin_only(func):
+    """Answer the callback query, enforce admin access and inject
+    (query, user_id) into the wrapped callback"""
+    @functools.wraps(func)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         if not query or not query.from_user:
             return
-            
         await query.answer()
         user_id = query.from_user.id
-        
         if not self.is_owner_or_admin(user_id):
             await query.edit_message_text(
                 "❌ Access Denied!\n\nYou don't have admin privileges.",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
-                ])
+                reply_markup=_ACCESS_DENIED_KB
             )
             return
-        
-        stats = format_admin_stats(self.db)
-        
-        keyboard = [
-            [InlineKeyboardButton("📝 Change Bio", callback_data="admin_change_bio")],
-            [InlineKeyboardButton("🛍️ Manage Products", callback_data="admin_manage_products")],
-            [InlineKeyboardButton("👥 User Management", callback_data="admin_user_management")],
-            [InlineKeyboardButton("📢 Broadcast Message", callback_data="admin_broadcast")],
-            [InlineKeyboardButton("⬅️ Back to Main", callback_data="back_to_main")]
-        ]
-        
+        return await func(self, update, context, query, user_id)
+    return wrapper
+
+
+class AdminHandlers(AsyncDBMixin):
+    def __init__(self, db_manager: DatabaseManager, bot_handlers=None):
+        self.db = db_manager
+        self.bot_handlers = bot_handlers
+        # Admins change rarely; keep them in-process to avoid a DB
+        # round-trip on every admin callback
+        self._admin_cache = set(self.db.get_all_admin_ids())
+
+    def is_owner_or_admin(self, user_id: int) -> bool:
+        """Check if user is owner or admin"""
+        return user_id in OWNER_IDS or user_id in self._admin_cache
+
+    def add_admin_cached(self, user_id: int, username: str, added_by: int):
+        """Add admin to the database and the in-process cache"""
+        self.db.add_admin(user_id, username, added_by)
+        self._admin_cache.add(user_id)
+
+    def remove_admin_cached(self, user_id: int):
+        """Remove admin from the database and the in-process cache"""
+        self.db.remove_admin(user_id)
+        self._admin_cache.discard(user_id)
+
+    @admin_only
+    async def admin_panel_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
+        """Show admin panel"""
+        # Admin screens edit the same message outside BotHandlers' render
+        # tracking; drop the cached text so back_to_main re-renders fully
+        if context.user_data is not None:
+            context.user_data.pop('last_rendered', None)
+
+        stats = await self._db(format_admin_stats, self.db)
+
         # Owner-only features
-        if user_id in OWNER_IDS:
-            keyboard.insert(-1, [InlineKeyboardButton("👤 Admin Management", callback_data="admin_manage_admins")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        reply_markup = _ADMIN_KB_OWNER if user_id in OWNER_IDS else _ADMIN_KB_ADMIN
+
         admin_message = f"⚙️ *Admin Panel*\n\n{stats}"
         
         try:
@@ -68,202 +187,100 @@ class AdminHandlers:
                 parse_mode='Markdown'
             )
         except Exception as e:
-            logger.error(f"Error in admin panel: {e}")
+            logger.error("Error in admin panel: %s", e)
 
-    async def change_bio_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def change_bio_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Handle change bio request"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        current_bio = self.db.get_setting('bio_message', 'Default bio message')
+        current_bio = await self._db(self.db.get_setting, 'bio_message', 'Default bio message')
         
         await query.edit_message_text(
-            f"📝 *Change Bio Message*\n\n"
-            f"*Current Bio:*\n{current_bio[:150]}...\n\n"
-            f"Send your new bio message below:\n"
-            f"• Use markdown formatting\n"
-            f"• Include emojis for engagement\n"
-            f"• Keep it professional",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("❌ Cancel", callback_data="admin_panel")]
-            ]),
+            _BIO_PROMPT_PREFIX + current_bio[:150] + _BIO_PROMPT_SUFFIX,
+            reply_markup=_CANCEL_KB,
             parse_mode='Markdown'
         )
         
         return WAITING_BIO
 
-    async def manage_products_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def manage_products_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Show product management menu"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        products = self.db.get_all_products()
-        product_count = len(products)
-        
-        keyboard = [
-            [InlineKeyboardButton("📋 View All Products", callback_data="admin_view_products")],
-            [InlineKeyboardButton("➕ Add New Product", callback_data="admin_add_product")],
-            [InlineKeyboardButton("✏️ Edit Product", callback_data="admin_edit_product")],
-            [InlineKeyboardButton("🗑️ Delete Product", callback_data="admin_delete_product")],
-            [InlineKeyboardButton("⬅️ Back to Admin Panel", callback_data="admin_panel")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        product_count = await self._db(self.db.get_product_count)
+
         await query.edit_message_text(
-            f"🛍️ *Product Management*\n\n"
-            f"📊 Total Products: {product_count}\n\n"
-            f"Choose an action:",
-            reply_markup=reply_markup,
+            _MANAGE_PRODUCTS_TMPL.format(n=product_count),
+            reply_markup=_PRODUCT_MGMT_KB,
             parse_mode='Markdown'
         )
 
-    async def view_products_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def view_products_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Show all products"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        products = self.db.get_all_products()
-        
+        products = await self._db(self.db.get_all_products)
+
         if not products:
             message = "📦 *All Products*\n\nNo products found."
         else:
-            message = "📦 *All Products*\n\n"
-            for i, product in enumerate(products, 1):
-                message += f"{i}. *{product['name']}*\n"
-                message += f"   Category: {product['category']}\n"
-                message += f"   Price: ₹{product['price']}\n"
-                message += f"   Features: {product['features'][:50]}...\n\n"
-        
-        keyboard = [
-            [InlineKeyboardButton("⬅️ Back to Products", callback_data="admin_manage_products")]
-        ]
-        
+            lines = [
+                f"{i}. *{p['name']}*\n"
+                f"   Category: {p['category']}\n"
+                f"   Price: ₹{p['price']}\n"
+                f"   Features: {p['features'][:50]}...\n"
+                for i, p in enumerate(products, 1)
+            ]
+            message = "📦 *All Products*\n\n" + "\n".join(lines)
+
         await query.edit_message_text(
             message,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=_BACK_TO_PRODUCTS_KB,
             parse_mode='Markdown'
         )
 
-    async def user_management_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def user_management_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Show user management menu"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        user_count = self.db.get_user_count()
-        
-        keyboard = [
-            [InlineKeyboardButton("👥 View All Users", callback_data="admin_view_users")],
-            [InlineKeyboardButton("📊 User Statistics", callback_data="admin_user_stats")],
-            [InlineKeyboardButton("⬅️ Back to Admin Panel", callback_data="admin_panel")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        user_count = await self._db(self.db.get_user_count)
+
         await query.edit_message_text(
-            f"👥 *User Management*\n\n"
-            f"📊 Total Users: {user_count}\n\n"
-            f"Choose an action:",
-            reply_markup=reply_markup,
+            _USER_MGMT_TMPL.format(n=user_count),
+            reply_markup=_USER_MGMT_KB,
             parse_mode='Markdown'
         )
 
-    async def view_users_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def view_users_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Show all users"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        users = self.db.get_all_users()
-        
+        users = await self._db(self.db.get_all_users)
+
         if not users:
             message = "👥 *All Users*\n\nNo users found."
         else:
-            message = "👥 *All Users*\n\n"
-            for i, user in enumerate(users[:10], 1):  # Show first 10 users
-                username = user.get('username', 'No username')
-                first_name = user.get('first_name', 'Unknown')
-                message += f"{i}. {first_name} (@{username})\n"
-                message += f"   ID: {user['user_id']}\n"
-                message += f"   Joined: {user.get('created_at', 'Unknown')}\n\n"
-            
+            # Show first 10 users
+            lines = [
+                f"{i}. {user.get('first_name', 'Unknown')} (@{user.get('username', 'No username')})\n"
+                f"   ID: {user['user_id']}\n"
+                f"   Joined: {user.get('created_at', 'Unknown')}\n"
+                for i, user in enumerate(users[:10], 1)
+            ]
+            message = "👥 *All Users*\n\n" + "\n".join(lines)
+
             if len(users) > 10:
-                message += f"... and {len(users) - 10} more users"
-        
-        keyboard = [
-            [InlineKeyboardButton("⬅️ Back to User Management", callback_data="admin_user_management")]
-        ]
-        
+                message += f"\n... and {len(users) - 10} more users"
+
         await query.edit_message_text(
             message,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=_BACK_TO_USER_MGMT_KB,
             parse_mode='Markdown'
         )
 
-    async def broadcast_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @admin_only
+    async def broadcast_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query, user_id):
         """Handle broadcast message request"""
-        query = update.callback_query
-        if not query or not query.from_user:
-            return
-            
-        await query.answer()
-        user_id = query.from_user.id
-        
-        if not self.is_owner_or_admin(user_id):
-            await query.edit_message_text("❌ Access denied!")
-            return
-        
-        user_count = self.db.get_user_count()
-        
+        user_count = await self._db(self.db.get_user_count)
+
         await query.edit_message_text(
-            f"📢 *Broadcast Message*\n\n"
-            f"👥 Total Users: {user_count}\n\n"
-            f"Send your broadcast message below:\n"
-            f"• Keep it clear and concise\n"
-            f"• Use markdown formatting\n"
-            f"• Include relevant information",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("❌ Cancel", callback_data="admin_panel")]
-            ]),
+            _BROADCAST_PROMPT_TMPL.format(n=user_count),
+            reply_markup=_CANCEL_KB,
             parse_mode='Markdown'
         )
         
@@ -281,7 +298,9 @@ class AdminHandlers:
             return ConversationHandler.END
         
         new_bio = update.message.text or "Default bio message"
-        self.db.set_setting('bio_message', new_bio)
+        await self._db(self.db.set_setting, 'bio_message', new_bio)
+        if self.bot_handlers:
+            self.bot_handlers.invalidate_cache('bio')
         
         await update.message.reply_text(
             f"✅ *Bio Updated Successfully!*\n\n"
@@ -291,6 +310,27 @@ class AdminHandlers:
         
         return ConversationHandler.END
 
+    async def _status_loop(self, status_message, counters, total):
+        """Edit the broadcast status message at most once per second, and
+        only when the counters actually changed since the last edit"""
+        last = None
+        while True:
+            await asyncio.sleep(1)
+            snapshot = (counters['sent'], counters['failed'])
+            if snapshot == last:
+                continue
+            last = snapshot
+            try:
+                await status_message.edit_text(
+                    f"📤 *Broadcasting Message...*\n\n"
+                    f"👥 Total Users: {total}\n"
+                    f"✅ Sent: {snapshot[0]}\n"
+                    f"❌ Failed: {snapshot[1]}",
+                    parse_mode='Markdown'
+                )
+            except Exception:
+                pass
+
     async def handle_broadcast_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle broadcast message"""
         if not update.message or not update.effective_user:
@@ -303,51 +343,63 @@ class AdminHandlers:
             return ConversationHandler.END
         
         broadcast_text = update.message.text or "No message provided"
-        users = self.db.get_all_users()
-        
-        sent_count = 0
-        failed_count = 0
-        
+
+        # Ack immediately and run the actual sending in the background, so
+        # the admin's conversation isn't pinned for the broadcast duration
         status_message = await update.message.reply_text(
-            f"📤 *Broadcasting Message...*\n\n"
-            f"👥 Total Users: {len(users)}\n"
-            f"✅ Sent: {sent_count}\n"
-            f"❌ Failed: {failed_count}",
+            "📤 *Broadcast started...*",
             parse_mode='Markdown'
         )
-        
-        for user in users:
-            try:
-                await context.bot.send_message(
-                    chat_id=user['user_id'],
-                    text=f"📢 *Broadcast Message*\n\n{broadcast_text}",
-                    parse_mode='Markdown'
-                )
-                sent_count += 1
-                
-                # Update status every 10 messages
-                if sent_count % 10 == 0:
-                    await status_message.edit_text(
-                        f"📤 *Broadcasting Message...*\n\n"
-                        f"👥 Total Users: {len(users)}\n"
-                        f"✅ Sent: {sent_count}\n"
-                        f"❌ Failed: {failed_count}",
+        context.application.create_task(
+            self._run_broadcast(context, broadcast_text, status_message)
+        )
+
+        return ConversationHandler.END
+
+    async def _run_broadcast(self, context, broadcast_text, status_message):
+        """Concurrent broadcast pipeline, run as a background task"""
+        total_users = await self._db(self.db.get_user_count)
+
+        counters = {'sent': 0, 'failed': 0}
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        limiter = TokenBucket(BROADCAST_CONCURRENCY)
+
+        async def _send_one(user_id):
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    await context.bot.send_message(
+                        chat_id=user_id,
+                        text=f"📢 *Broadcast Message*\n\n{broadcast_text}",
                         parse_mode='Markdown'
                     )
-                    
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Failed to send broadcast to {user['user_id']}: {e}")
-        
+                    counters['sent'] += 1
+                    return True, user_id
+                except Exception as e:
+                    counters['failed'] += 1
+                    logger.error("Failed to send broadcast to %s: %s", user_id, e)
+                    return False, user_id
+
+        status_task = asyncio.create_task(self._status_loop(status_message, counters, total_users))
+        try:
+            # Stream users in batches so peak memory stays O(batch) and the
+            # first sends start before the full user list is read
+            batches = self.db.iter_user_ids()
+            while True:
+                batch = await self._db(next, batches, None)
+                if batch is None:
+                    break
+                await asyncio.gather(*[_send_one(uid) for uid in batch], return_exceptions=True)
+        finally:
+            status_task.cancel()
+
         await status_message.edit_text(
             f"✅ *Broadcast Completed!*\n\n"
-            f"👥 Total Users: {len(users)}\n"
-            f"✅ Successfully Sent: {sent_count}\n"
-            f"❌ Failed: {failed_count}",
+            f"👥 Total Users: {total_users}\n"
+            f"✅ Successfully Sent: {counters['sent']}\n"
+            f"❌ Failed: {counters['failed']}",
             parse_mode='Markdown'
         )
-        
-        return ConversationHandler.END
 
     async def cancel_conversation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Cancel current conversation"""
@@ -375,8 +427,15 @@ class AdminHandlers:
             return
         
         username = context.args[0].replace('@', '')
-        
-        # Add admin logic here
+
+        target = await self._db(self.db.get_user_by_username, username)
+        if not target:
+            await update.message.reply_text(
+                f"❌ User @{username} not found. They must start the bot first."
+            )
+            return
+
+        await self._db(self.add_admin_cached, target['user_id'], username, user_id)
         await update.message.reply_text(f"✅ @{username} has been added as admin!")
 
     async def removeadmin_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -398,8 +457,13 @@ class AdminHandlers:
             return
         
         username = context.args[0].replace('@', '')
-        
-        # Remove admin logic here
+
+        target = await self._db(self.db.get_user_by_username, username)
+        if not target:
+            await update.message.reply_text(f"❌ User @{username} not found.")
+            return
+
+        await self._db(self.remove_admin_cached, target['user_id'])
         await update.message.reply_text(f"✅ @{username} has been removed from admin!")
 
     async def users_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -413,7 +477,7 @@ class AdminHandlers:
             await update.message.reply_text("❌ Access denied!")
             return
         
-        user_count = self.db.get_user_count()
+        user_count = await self._db(self.db.get_user_count)
         await update.message.reply_text(f"👥 Total Users: {user_count}")
 
     async def broadcast_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -435,17 +499,30 @@ class AdminHandlers:
             return
         
         message = ' '.join(context.args)
-        users = self.db.get_all_users()
-        
+
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        limiter = TokenBucket(BROADCAST_CONCURRENCY)
+
+        async def _send_one(target_id):
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    await context.bot.send_message(
+                        chat_id=target_id,
+                        text=f"📢 {message}"
+                    )
+                    return True
+                except Exception as e:
+                    logger.error("Failed to send to %s: %s", target_id, e)
+                    return False
+
         sent_count = 0
-        for user in users:
-            try:
-                await context.bot.send_message(
-                    chat_id=user['user_id'],
-                    text=f"📢 {message}"
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send to {user['user_id']}: {e}")
-        
+        batches = self.db.iter_user_ids()
+        while True:
+            batch = await self._db(next, batches, None)
+            if batch is None:
+                break
+            results = await asyncio.gather(*[_send_one(uid) for uid in batch], return_exceptions=True)
+            sent_count += sum(1 for r in results if r is True)
+
         await update.message.reply_text(f"✅ Broadcast sent to {sent_count} users!")
\ No newline at end of file
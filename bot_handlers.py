@@ -5,21 +5,181 @@ Author: AI Assistant
 
 import logging
 import asyncio
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from config import OWNER_IDS
 from database import DatabaseManager
 from qr_code import QRCodeManager
-from utils import format_product_message, send_typing_action
+from utils import AsyncDBMixin, format_product_message, send_typing_action
 
 logger = logging.getLogger(__name__)
 
-class BotHandlers:
+# How long cached DB reads stay fresh (seconds)
+CACHE_TTL = 30.0
+
+# How often buffered user writes are flushed to the DB (seconds)
+FLUSH_INTERVAL = 5.0
+
+# Minimum seconds between buffered last-activity updates per user
+ACTIVITY_THROTTLE = 60.0
+
+# Pre-built static keyboards, shared across callbacks to avoid rebuilding
+# the same button objects on every press
+_MAIN_MENU_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("💎 Premium Files", callback_data="premium_files")]
+])
+
+_MAIN_MENU_ADMIN_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("💎 Premium Files", callback_data="premium_files")],
+    [InlineKeyboardButton("⚙️ Admin Panel", callback_data="admin_panel")]
+])
+
+_BACK_TO_MAIN_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⬅️ Back to Main", callback_data="back_to_main")]
+])
+
+_BACK_TO_CATEGORIES_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⬅️ Back to Categories", callback_data="premium_files")]
+])
+
+_GET_STARTED_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🚀 Get Started", callback_data="back_to_main")]
+])
+
+class BotHandlers(AsyncDBMixin):
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.qr_manager = QRCodeManager()
+        self._cache = {}
+        # Write-behind buffers: handlers record user upserts/activity here
+        # and a background task flushes them in one transaction
+        self._new_users_buf = {}
+        self._activity_buf = {}
+        # user_id -> monotonic time of the last buffered activity update
+        self._activity_last = {}
+        self._flush_task = None
+        # One outstanding typing action per chat at most
+        self._typing_tasks = {}
         self._init_default_data()
 
+    async def _cached(self, key, loader):
+        """Return a cached value, reloading it when older than CACHE_TTL.
+
+        `loader` is awaited, so DB-backed loaders should go through _db.
+        """
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < CACHE_TTL:
+            return entry[1]
+        value = await loader()
+        self._cache[key] = (now, value)
+        return value
+
+    def invalidate_cache(self, *keys):
+        """Drop cached entries after a write (all entries if no keys given)"""
+        if keys:
+            for key in keys:
+                self._cache.pop(key, None)
+        else:
+            self._cache.clear()
+
+    async def _render(self, query, context, text, reply_markup, parse_mode='Markdown'):
+        """Edit the message, sending only the keyboard when the text is
+        unchanged from our last render of the same message"""
+        rendered = context.user_data.setdefault('last_rendered', {})
+        msg_id = query.message.message_id if query.message else None
+        if msg_id is not None and rendered.get(msg_id) == text:
+            await query.edit_message_reply_markup(reply_markup=reply_markup)
+            return
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+        if msg_id is not None:
+            rendered[msg_id] = text
+
+    def _typing(self, context, chat_id: int, duration: float = 1.0):
+        """Send a typing action, debounced so rapid re-entries for the same
+        chat collapse into one outstanding request"""
+        task = self._typing_tasks.get(chat_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(send_typing_action(context, chat_id, duration))
+        task.add_done_callback(lambda _: self._typing_tasks.pop(chat_id, None))
+        self._typing_tasks[chat_id] = task
+
+    def _buffer_user(self, user):
+        """Queue a user upsert for the next background flush (O(1), no DB)"""
+        now = int(time.time())
+        self._new_users_buf[user.id] = (
+            user.id,
+            user.username or f"user_{user.id}",
+            user.first_name or "Unknown",
+            user.last_name or "",
+            now,
+            now,
+        )
+        self._ensure_flush_task()
+
+    def _touch_activity(self, user_id: int):
+        """Queue a last-activity update for the next background flush,
+        at most once per ACTIVITY_THROTTLE seconds per user"""
+        now = time.monotonic()
+        if now - self._activity_last.get(user_id, 0) < ACTIVITY_THROTTLE:
+            return
+        self._activity_last[user_id] = now
+        self._activity_buf[user_id] = int(time.time())
+        self._ensure_flush_task()
+
+    def _ensure_flush_task(self):
+        # Started lazily because __init__ runs before the event loop exists
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self._flush_buffers()
+            except Exception as e:
+                logger.error("Error flushing user buffers: %s", e)
+
+    async def _flush_buffers(self):
+        """Write buffered user upserts and activity updates in bulk"""
+        if self._new_users_buf:
+            rows = list(self._new_users_buf.values())
+            self._new_users_buf.clear()
+            await self._db(self.db.bulk_add_users, rows)
+        if self._activity_buf:
+            rows = [(ts, uid) for uid, ts in self._activity_buf.items()]
+            self._activity_buf.clear()
+            await self._db(self.db.bulk_update_activity, rows)
+
+    async def _get_bio(self) -> str:
+        return await self._cached(
+            'bio', lambda: self._db(self.db.get_setting, 'bio_message', 'Welcome to our store!'))
+
+    async def _get_catalog(self):
+        """Products plus derived indexes, built in one pass and cached together"""
+        async def _build():
+            products = await self._db(self.db.get_all_products)
+            by_id = {p['id']: p for p in products}
+            by_cat = {}
+            for p in products:
+                by_cat.setdefault(p['category'], []).append(p)
+            return {
+                'products': products,
+                'by_id': by_id,
+                'by_cat': by_cat,
+                # Sorted so the category keyboard order is deterministic
+                'categories': sorted(by_cat),
+            }
+        return await self._cached('catalog', _build)
+
+    async def _get_products(self):
+        return (await self._get_catalog())['products']
+
+    async def _get_products_by_id(self):
+        return (await self._get_catalog())['by_id']
+
     def _init_default_data(self):
         """Initialize default data if not exists"""
         if not self.db.get_setting('bio_message'):
@@ -32,19 +192,21 @@ class BotHandlers:
                 "💬 Contact: @Abdul20298"
             )
             self.db.set_setting('bio_message', default_bio)
+            self.invalidate_cache('bio')
 
         # Initialize default products
         if not self.db.get_all_products():
             self.db.add_product(
-                "Diuwin", "Diuwin Premium", 
+                "Diuwin", "Diuwin Premium",
                 "Premium features, Ad-free experience, Priority support",
                 "299", "Complete premium access to Diuwin application"
             )
             self.db.add_product(
-                "Cricket 24", "Cricket 24 Pro", 
+                "Cricket 24", "Cricket 24 Pro",
                 "Live scores, Premium stats, Ad-free viewing",
                 "199", "Professional cricket tracking and statistics"
             )
+            self.invalidate_cache('catalog')
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -54,21 +216,10 @@ class BotHandlers:
         user = update.effective_user
         
         # Add typing action for better UX
-        asyncio.create_task(send_typing_action(context, user.id, 1.0))
+        self._typing(context, user.id, 1.0)
 
-        # Add user to database with safe handling
-        try:
-            self.db.add_user(
-                user.id, 
-                user.username or f"user_{user.id}", 
-                user.first_name or "Unknown",
-                user.last_name or ""
-            )
-            
-            # Update activity
-            self.db.update_user_activity(user.id)
-        except Exception as e:
-            logger.error(f"Error adding user {user.id}: {e}")
+        # Buffer the user upsert; the flush loop persists it shortly after
+        self._buffer_user(user)
 
         # Check if user is owner/admin
         if user.id in OWNER_IDS:
@@ -80,19 +231,14 @@ class BotHandlers:
             welcome_text = f"👋 Welcome {user.first_name}!"
 
         # Get bio message
-        bio_message = self.db.get_setting('bio_message', 'Welcome to our store!')
-        
-        # Create keyboard
-        keyboard = [
-            [InlineKeyboardButton("💎 Premium Files", callback_data="premium_files")]
-        ]
-        
-        # Add admin panel button for admins
-        if self.db.is_admin(user.id) or user.id in OWNER_IDS:
-            keyboard.append([InlineKeyboardButton("⚙️ Admin Panel", callback_data="admin_panel")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        bio_message = await self._get_bio()
+
+        # Admins get the extra admin panel row
+        if user.id in OWNER_IDS or await self._db(self.db.is_admin, user.id):
+            reply_markup = _MAIN_MENU_ADMIN_KB
+        else:
+            reply_markup = _MAIN_MENU_KB
+
         await update.message.reply_text(
             f"{welcome_text}\n\n{bio_message}",
             reply_markup=reply_markup,
@@ -108,21 +254,18 @@ class BotHandlers:
         await query.answer()
         
         # Add typing action
-        asyncio.create_task(send_typing_action(context, query.from_user.id, 0.5))
+        self._typing(context, query.from_user.id, 0.5)
         
         # Update user activity
-        self.db.update_user_activity(query.from_user.id)
-        
-        # Get unique categories
-        products = self.db.get_all_products()
-        categories = list(set(product['category'] for product in products))
+        self._touch_activity(query.from_user.id)
+
+        # Get unique categories (pre-sorted by the catalog cache)
+        categories = (await self._get_catalog())['categories']
         
         if not categories:
             await query.edit_message_text(
                 "🚫 No products available at the moment.\n\nPlease check back later!",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("⬅️ Back to Main", callback_data="back_to_main")]
-                ])
+                reply_markup=_BACK_TO_MAIN_KB
             )
             return
         
@@ -131,12 +274,12 @@ class BotHandlers:
             keyboard.append([InlineKeyboardButton(f"📁 {category}", callback_data=f"category_{category}")])
         
         keyboard.append([InlineKeyboardButton("⬅️ Back to Main", callback_data="back_to_main")])
-        
-        await query.edit_message_text(
+
+        await self._render(
+            query, context,
             "💎 *Premium Digital Products*\n\n"
             "Choose a category to explore our premium collection:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='Markdown'
+            InlineKeyboardMarkup(keyboard)
         )
 
     async def category_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -147,15 +290,13 @@ class BotHandlers:
             
         await query.answer()
         
-        category = query.data.replace("category_", "")
-        products = self.db.get_products_by_category(category)
+        category = query.data.removeprefix("category_")
+        products = (await self._get_catalog())['by_cat'].get(category, [])
         
         if not products:
             await query.edit_message_text(
                 f"🚫 No products found in {category} category.",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("⬅️ Back to Categories", callback_data="premium_files")]
-                ])
+                reply_markup=_BACK_TO_CATEGORIES_KB
             )
             return
         
@@ -167,12 +308,12 @@ class BotHandlers:
             )])
         
         keyboard.append([InlineKeyboardButton("⬅️ Back to Categories", callback_data="premium_files")])
-        
-        await query.edit_message_text(
+
+        await self._render(
+            query, context,
             f"📁 *{category} Products*\n\n"
             f"Available products in this category:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='Markdown'
+            InlineKeyboardMarkup(keyboard)
         )
 
     async def product_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -183,35 +324,28 @@ class BotHandlers:
             
         await query.answer()
         
-        product_id = int(query.data.replace("product_", ""))
-        products = self.db.get_all_products()
-        product = next((p for p in products if p['id'] == product_id), None)
+        product_id = int(query.data.removeprefix("product_"))
+        product = (await self._get_products_by_id()).get(product_id)
         
         if not product:
             await query.edit_message_text(
                 "❌ Product not found!",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("⬅️ Back", callback_data="premium_files")]
-                ])
+                reply_markup=_BACK_TO_CATEGORIES_KB
             )
             return
         
-        await self.show_product_details(query, product)
+        await self.show_product_details(query, context, product)
 
-    async def show_product_details(self, query, product):
+    async def show_product_details(self, query, context, product):
         """Show detailed product information"""
         product_message = format_product_message(product)
-        
+
         keyboard = [
             [InlineKeyboardButton("💳 Buy Now", callback_data=f"buy_{product['id']}")],
             [InlineKeyboardButton("⬅️ Back to Products", callback_data=f"category_{product['category']}")]
         ]
-        
-        await query.edit_message_text(
-            product_message,
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='Markdown'
-        )
+
+        await self._render(query, context, product_message, InlineKeyboardMarkup(keyboard))
 
     async def buy_now_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle buy now button"""
@@ -221,16 +355,15 @@ class BotHandlers:
             
         await query.answer()
         
-        product_id = int(query.data.replace("buy_", ""))
-        products = self.db.get_all_products()
-        product = next((p for p in products if p['id'] == product_id), None)
-        
+        product_id = int(query.data.removeprefix("buy_"))
+        product = (await self._get_products_by_id()).get(product_id)
+
         if not product:
             await query.edit_message_text("❌ Product not found!")
             return
-        
+
         # Add order to database
-        self.db.add_order(query.from_user.id, product['name'], product['price'])
+        await self._db(self.db.add_order, query.from_user.id, product['name'], product['price'])
         
         # Send payment instructions
         payment_message = self.qr_manager.create_payment_qr_message(product['price'])
@@ -245,17 +378,30 @@ class BotHandlers:
         # Send QR code if exists
         if self.qr_manager.qr_code_exists():
             try:
-                with open(self.qr_manager.get_qr_code_path(), 'rb') as qr_file:
+                if self.qr_manager.cached_file_id:
+                    # Resend by file_id: no disk read, no re-upload
                     await query.message.reply_photo(
-                        photo=qr_file,
+                        photo=self.qr_manager.cached_file_id,
                         caption=payment_message,
                         reply_markup=reply_markup,
                         parse_mode='Markdown'
                     )
-                    # Delete original message to avoid clutter
-                    await query.delete_message()
+                else:
+                    with open(self.qr_manager.get_qr_code_path(), 'rb') as qr_file:
+                        sent = await query.message.reply_photo(
+                            photo=qr_file,
+                            caption=payment_message,
+                            reply_markup=reply_markup,
+                            parse_mode='Markdown'
+                        )
+                    if sent.photo:
+                        self.qr_manager.cached_file_id = sent.photo[-1].file_id
+                # Delete original message to avoid clutter
+                await query.delete_message()
             except Exception as e:
-                logger.error(f"Error sending QR code: {e}")
+                # A stale file_id would keep failing; drop it and fall back
+                self.qr_manager.cached_file_id = None
+                logger.error("Error sending QR code: %s", e)
                 await query.edit_message_text(
                     payment_message,
                     reply_markup=reply_markup,
@@ -277,24 +423,15 @@ class BotHandlers:
         await query.answer()
         
         user = query.from_user
-        bio_message = self.db.get_setting('bio_message', 'Welcome to our store!')
-        
-        # Create main menu keyboard
-        keyboard = [
-            [InlineKeyboardButton("💎 Premium Files", callback_data="premium_files")]
-        ]
-        
-        # Add admin panel button for admins
-        if self.db.is_admin(user.id) or user.id in OWNER_IDS:
-            keyboard.append([InlineKeyboardButton("⚙️ Admin Panel", callback_data="admin_panel")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            bio_message,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
+        bio_message = await self._get_bio()
+
+        # Admins get the extra admin panel row
+        if user.id in OWNER_IDS or await self._db(self.db.is_admin, user.id):
+            reply_markup = _MAIN_MENU_ADMIN_KB
+        else:
+            reply_markup = _MAIN_MENU_KB
+
+        await self._render(query, context, bio_message, reply_markup)
     
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle photo uploads (payment screenshots)"""
@@ -304,7 +441,7 @@ class BotHandlers:
         user = update.effective_user
         
         # Add typing action
-        asyncio.create_task(send_typing_action(context, user.id, 1.0))
+        self._typing(context, user.id, 1.0)
         
         # Get the largest photo
         photo = update.message.photo[-1]
@@ -313,7 +450,7 @@ class BotHandlers:
         # Save screenshot reference in database
         try:
             # Update the latest order with screenshot
-            self.db.add_order(user.id, "Screenshot Upload", "0", file_id)
+            await self._db(self.db.add_order, user.id, "Screenshot Upload", "0", file_id)
             
             await update.message.reply_text(
                 "✅ *Payment Screenshot Received!*\n\n"
@@ -323,7 +460,7 @@ class BotHandlers:
                 parse_mode='Markdown'
             )
         except Exception as e:
-            logger.error(f"Error saving screenshot: {e}")
+            logger.error("Error saving screenshot: %s", e)
             await update.message.reply_text(
                 "❌ Error processing screenshot. Please try again or contact @Abdul20298",
                 parse_mode='Markdown'
@@ -336,21 +473,11 @@ class BotHandlers:
             
         user = update.effective_user
         
-        # Add user if not exists
-        try:
-            self.db.add_user(
-                user.id, 
-                user.username or f"user_{user.id}", 
-                user.first_name or "Unknown",
-                user.last_name or ""
-            )
-        except Exception as e:
-            logger.error(f"Error handling message from {user.id}: {e}")
+        # Add user if not exists (buffered, flushed in the background)
+        self._buffer_user(user)
         
         # Simple response for general messages
         await update.message.reply_text(
             "👋 Hello! Use /start to see available options.",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("🚀 Get Started", callback_data="back_to_main")]
-            ])
+            reply_markup=_GET_STARTED_KB
         )
\ No newline at end of file
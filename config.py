@@ -3,7 +3,7 @@ import os
 # Bot Configuration
 BOT_TOKEN = "7932661982:AAFRBaucYAh9wmnnWxEllc01t0DMbr1rBIo"
 OWNER_USERNAMES = ["Abdul20298", "Smile_Bot123"]
-OWNER_IDS = []  # Will be populated when owners first interact
+OWNER_IDS = frozenset()  # Will be populated when owners first interact
 
 # Database Configuration
 DATABASE_PATH = "bot_database.db"
@@ -1,18 +1,67 @@
 import sqlite3
 import json
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
 from typing import List, Dict, Optional
 
 class DatabaseManager:
+    # Minimum seconds between persisted last_activity writes per user;
+    # anything finer is noise that costs a WAL append and fsync
+    _ACTIVITY_FLUSH_S = 60
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # user_id -> monotonic time of the last persisted activity write
+        self._activity_cache: Dict[int, float] = {}
+        # Cached active-user count; None means it needs a recount
+        self._user_count: Optional[int] = None
+        # One long-lived connection shared by all threads, guarded by a lock
+        # since python-telegram-bot runs handlers concurrently. Reusing the
+        # connection keeps SQLite's page cache warm instead of discarding it
+        # on every call.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # Row objects give zero-copy column access and convert to dicts in
+        # one C-level call where callers need them
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._tune_connection()
         self.init_database()
-    
+        # Admins change rarely; keep their IDs in memory so is_admin is a
+        # hash lookup instead of a query
+        self._admin_ids = set(
+            row[0] for row in self._conn.execute('SELECT user_id FROM admins'))
+
+    def _tune_connection(self):
+        """Apply performance PRAGMAs to the shared connection"""
+        cursor = self._conn.cursor()
+        # WAL lets readers proceed while a writer appends to the -wal file
+        # and needs only one fsync per commit; it is meaningless for
+        # in-memory databases, which have no journal file at all
+        if not self.db_path.endswith(':memory:'):
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA cache_size=-64000')
+        cursor.execute('PRAGMA busy_timeout=30000')
+
+    @contextmanager
+    def _transaction(self):
+        """Group writes into one BEGIN IMMEDIATE ... COMMIT, paying a single
+        fsync for the whole batch instead of one per row"""
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                yield self._conn
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
     def init_database(self):
         """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        cursor = self._conn.cursor()
+
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -20,22 +69,22 @@ class DatabaseManager:
                 username TEXT,
                 first_name TEXT,
                 last_name TEXT,
-                joined_date TEXT,
+                joined_date INTEGER,
                 is_blocked INTEGER DEFAULT 0,
-                last_activity TEXT
+                last_activity INTEGER
             )
         ''')
-        
+
         # Admins table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS admins (
                 user_id INTEGER PRIMARY KEY,
                 username TEXT,
                 added_by INTEGER,
-                added_date TEXT
+                added_date INTEGER
             )
         ''')
-        
+
         # Products table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS products (
@@ -45,10 +94,10 @@ class DatabaseManager:
                 features TEXT,
                 price TEXT,
                 description TEXT,
-                created_date TEXT
+                created_date INTEGER
             )
         ''')
-        
+
         # Orders table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS orders (
@@ -57,11 +106,11 @@ class DatabaseManager:
                 product_name TEXT,
                 amount TEXT,
                 status TEXT,
-                order_date TEXT,
+                order_date INTEGER,
                 screenshot_file_id TEXT
             )
         ''')
-        
+
         # Settings table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS settings (
@@ -69,206 +118,217 @@ class DatabaseManager:
                 value TEXT
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-    
+
+        # Indexes for the hot lookup predicates; the partial index on users
+        # covers the is_blocked = 0 filter used by counts and broadcasts
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_users_active ON users(is_blocked)
+            WHERE is_blocked = 0
+        ''')
+
     def add_user(self, user_id: int, username: str, first_name: str, last_name: str = None):
         """Add or update user information"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO users 
-            (user_id, username, first_name, last_name, joined_date, last_activity)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, username, first_name, last_name, 
-              datetime.now().isoformat(), datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            # Indexed PK probe so the cached count only moves for new users
+            cursor = self._conn.execute(
+                'SELECT 1 FROM users WHERE user_id = ? LIMIT 1', (user_id,))
+            is_new = cursor.fetchone() is None
+
+            # Native upsert: updates in place instead of delete+reinsert,
+            # and keeps the original joined_date and is_blocked flag
+            self._conn.execute('''
+                INSERT INTO users
+                (user_id, username, first_name, last_name, joined_date, last_activity)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    last_activity = excluded.last_activity
+            ''', (user_id, username, first_name, last_name,
+                  int(time.time()), int(time.time())))
+
+        if is_new and self._user_count is not None:
+            self._user_count += 1
+
+    def bulk_add_users(self, rows: List[tuple]):
+        """Insert or update many users in a single transaction
+
+        rows: (user_id, username, first_name, last_name, joined_date,
+        last_activity) tuples
+        """
+        with self._transaction() as conn:
+            conn.executemany('''
+                INSERT INTO users
+                (user_id, username, first_name, last_name, joined_date, last_activity)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    last_activity = excluded.last_activity
+            ''', rows)
+
+        # Unknown how many rows were new; recount lazily on next read
+        self._user_count = None
+
+    def bulk_update_activity(self, rows: List[tuple]):
+        """Update last_activity for many users in a single transaction
+
+        rows: (last_activity, user_id) tuples
+        """
+        with self._transaction() as conn:
+            conn.executemany('''
+                UPDATE users SET last_activity = ? WHERE user_id = ?
+            ''', rows)
+
     def update_user_activity(self, user_id: int):
-        """Update user's last activity"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE users SET last_activity = ? WHERE user_id = ?
-        ''', (datetime.now().isoformat(), user_id))
-        
-        conn.commit()
-        conn.close()
-    
+        """Update user's last activity, coalescing writes per user
+
+        Skips the UPDATE when this user's activity was persisted less than
+        _ACTIVITY_FLUSH_S seconds ago; second-level precision is plenty for
+        a "last seen" column.
+        """
+        now = time.monotonic()
+        if now - self._activity_cache.get(user_id, 0) < self._ACTIVITY_FLUSH_S:
+            return
+        self._activity_cache[user_id] = now
+        with self._lock:
+            self._conn.execute('''
+                UPDATE users SET last_activity = ? WHERE user_id = ?
+            ''', (int(time.time()), user_id))
+
     def add_admin(self, user_id: int, username: str, added_by: int):
         """Add admin user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO admins (user_id, username, added_by, added_date)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, username, added_by, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO admins (user_id, username, added_by, added_date)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username
+            ''', (user_id, username, added_by, int(time.time())))
+            self._admin_ids.add(user_id)
+
     def remove_admin(self, user_id: int):
         """Remove admin user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM admins WHERE user_id = ?', (user_id,))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('DELETE FROM admins WHERE user_id = ?', (user_id,))
+            self._admin_ids.discard(user_id)
+
+    def get_all_admin_ids(self) -> List[int]:
+        """Get all admin user IDs"""
+        with self._lock:
+            return list(self._admin_ids)
+
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        """Get user by username"""
+        with self._lock:
+            cursor = self._conn.execute('''
+                SELECT user_id, username, first_name, last_name FROM users WHERE username = ?
+            ''', (username,))
+            row = cursor.fetchone()
+
+        return dict(row) if row else None
+
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT user_id FROM admins WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        return result is not None
-    
+        return user_id in self._admin_ids
+
     def get_all_users(self) -> List[Dict]:
         """Get all users"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_id, username, first_name, last_name, joined_date, last_activity
-            FROM users WHERE is_blocked = 0
-        ''')
-        
-        users = []
-        for row in cursor.fetchall():
-            users.append({
-                'user_id': row[0],
-                'username': row[1],
-                'first_name': row[2],
-                'last_name': row[3],
-                'joined_date': row[4],
-                'last_activity': row[5]
-            })
-        
-        conn.close()
-        return users
-    
+        with self._lock:
+            cursor = self._conn.execute('''
+                SELECT user_id, username, first_name, last_name, joined_date, last_activity
+                FROM users WHERE is_blocked = 0
+            ''')
+            rows = cursor.fetchall()
+
+        return [dict(row) for row in rows]
+
+    def iter_user_ids(self, batch: int = 500):
+        """Yield batches of active user IDs without materializing all rows"""
+        with self._lock:
+            cursor = self._conn.execute('SELECT user_id FROM users WHERE is_blocked = 0')
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            yield [row[0] for row in rows]
+
     def add_product(self, category: str, name: str, features: str, price: str, description: str):
         """Add new product"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO products (category, name, features, price, description, created_date)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (category, name, features, price, description, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO products (category, name, features, price, description, created_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (category, name, features, price, description, int(time.time())))
+
     def get_products_by_category(self, category: str) -> List[Dict]:
         """Get products by category"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, features, price, description FROM products WHERE category = ?
-        ''', (category,))
-        
-        products = []
-        for row in cursor.fetchall():
-            products.append({
-                'id': row[0],
-                'name': row[1],
-                'features': row[2],
-                'price': row[3],
-                'description': row[4]
-            })
-        
-        conn.close()
-        return products
-    
+        with self._lock:
+            cursor = self._conn.execute('''
+                SELECT id, name, features, price, description FROM products WHERE category = ?
+            ''', (category,))
+            rows = cursor.fetchall()
+
+        return [dict(row) for row in rows]
+
     def get_all_products(self) -> List[Dict]:
         """Get all products"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, category, name, features, price, description FROM products
-        ''')
-        
-        products = []
-        for row in cursor.fetchall():
-            products.append({
-                'id': row[0],
-                'category': row[1],
-                'name': row[2],
-                'features': row[3],
-                'price': row[4],
-                'description': row[5]
-            })
-        
-        conn.close()
-        return products
-    
+        with self._lock:
+            cursor = self._conn.execute('''
+                SELECT id, category, name, features, price, description FROM products
+            ''')
+            rows = cursor.fetchall()
+
+        return [dict(row) for row in rows]
+
     def delete_product(self, product_id: int):
         """Delete product"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('DELETE FROM products WHERE id = ?', (product_id,))
+
     def add_order(self, user_id: int, product_name: str, amount: str, screenshot_file_id: str = None):
         """Add new order"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO orders (user_id, product_name, amount, status, order_date, screenshot_file_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, product_name, amount, 'pending', datetime.now().isoformat(), screenshot_file_id))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO orders (user_id, product_name, amount, status, order_date, screenshot_file_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, product_name, amount, 'pending',
+                  int(time.time()), screenshot_file_id))
+
     def get_setting(self, key: str, default: str = None) -> str:
         """Get setting value"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-        result = cursor.fetchone()
-        
-        conn.close()
+        with self._lock:
+            cursor = self._conn.execute('SELECT value FROM settings WHERE key = ?', (key,))
+            result = cursor.fetchone()
         return result[0] if result else default
-    
+
     def set_setting(self, key: str, value: str):
         """Set setting value"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
-        ''', (key, value))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO settings (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            ''', (key, value))
+
+    def get_product_count(self) -> int:
+        """Get total product count"""
+        with self._lock:
+            cursor = self._conn.execute('SELECT COUNT(*) FROM products')
+            return cursor.fetchone()[0]
+
     def get_user_count(self) -> int:
-        """Get total user count"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM users WHERE is_blocked = 0')
-        count = cursor.fetchone()[0]
-        
-        conn.close()
-        return count
+        """Get total user count (cached after the first read)"""
+        if self._user_count is None:
+            with self._lock:
+                cursor = self._conn.execute('SELECT COUNT(*) FROM users WHERE is_blocked = 0')
+                self._user_count = cursor.fetchone()[0]
+        return self._user_count
@@ -10,6 +10,7 @@ from telegram.ext import (
     Application, CommandHandler, CallbackQueryHandler,
     MessageHandler, filters, ConversationHandler
 )
+from telegram.request import HTTPXRequest
 from config import BOT_TOKEN
 from database import DatabaseManager
 from bot_handlers import BotHandlers
@@ -27,9 +28,26 @@ class DigitalProductBot:
     def __init__(self):
         self.db = DatabaseManager('bot_database.db')
         self.bot_handlers = BotHandlers(self.db)
-        self.admin_handlers = AdminHandlers(self.db)
+        self.admin_handlers = AdminHandlers(self.db, self.bot_handlers)
         self.application = None
 
+        # Callback routing tables: one O(1) dict lookup replaces a chain of
+        # per-handler regex matches on every button press
+        self._cb_map = {
+            'admin_panel': self.admin_handlers.admin_panel_callback,
+            'admin_manage_products': self.admin_handlers.manage_products_callback,
+            'admin_view_products': self.admin_handlers.view_products_callback,
+            'admin_user_management': self.admin_handlers.user_management_callback,
+            'admin_view_users': self.admin_handlers.view_users_callback,
+            'premium_files': self.bot_handlers.premium_files_callback,
+            'back_to_main': self.bot_handlers.back_to_main_callback,
+        }
+        self._prefix_map = {
+            'category': self.bot_handlers.category_callback,
+            'product': self.bot_handlers.product_callback,
+            'buy': self.bot_handlers.buy_now_callback,
+        }
+
     def setup_handlers(self):
         """Setup all bot handlers"""
         app = self.application
@@ -71,22 +89,9 @@ class DigitalProductBot:
         app.add_handler(bio_conversation)
         app.add_handler(broadcast_conversation)
 
-        # Main callback handlers
-        app.add_handler(CallbackQueryHandler(self.admin_handlers.admin_panel_callback, pattern="^admin_panel$"))
-        app.add_handler(CallbackQueryHandler(self.admin_handlers.manage_products_callback, pattern="^admin_manage_products$"))
-        app.add_handler(CallbackQueryHandler(self.admin_handlers.view_products_callback, pattern="^admin_view_products$"))
-        app.add_handler(CallbackQueryHandler(self.admin_handlers.user_management_callback, pattern="^admin_user_management$"))
-        app.add_handler(CallbackQueryHandler(self.admin_handlers.view_users_callback, pattern="^admin_view_users$"))
-
-        # Bot callback handlers
-        app.add_handler(CallbackQueryHandler(self.bot_handlers.premium_files_callback, pattern="^premium_files$"))
-        app.add_handler(CallbackQueryHandler(self.bot_handlers.category_callback, pattern="^category_"))
-        app.add_handler(CallbackQueryHandler(self.bot_handlers.product_callback, pattern="^product_"))
-        app.add_handler(CallbackQueryHandler(self.bot_handlers.buy_now_callback, pattern="^buy_"))
-        app.add_handler(CallbackQueryHandler(self.bot_handlers.back_to_main_callback, pattern="^back_to_main$"))
-
-        # Generic callback handlers for unhandled callbacks
-        app.add_handler(CallbackQueryHandler(self.handle_unknown_callback))
+        # Single dispatching handler for all remaining callbacks; conversation
+        # entry points above still get first pick of their patterns
+        app.add_handler(CallbackQueryHandler(self.dispatch_callback))
 
         # Message handlers
         app.add_handler(MessageHandler(filters.PHOTO, self.bot_handlers.handle_photo))
@@ -95,10 +100,18 @@ class DigitalProductBot:
         # Error handler
         app.add_error_handler(self.error_handler)
 
-    async def handle_unknown_callback(self, update: Update, context):
-        """Handle unknown callback queries"""
+    async def dispatch_callback(self, update: Update, context):
+        """Route a callback query via the dispatch tables"""
         query = update.callback_query
-        if query:
+        if not query:
+            return
+
+        handler = self._cb_map.get(query.data)
+        if handler is None and query.data:
+            handler = self._prefix_map.get(query.data.split('_', 1)[0])
+        if handler is not None:
+            await handler(update, context)
+        else:
             await query.answer("⚠️ This action is not available.")
 
     async def error_handler(self, update: object, context):
@@ -119,11 +132,15 @@ class DigitalProductBot:
 
         self.db.init_database()
 
+        # Large keep-alive connection pool so concurrent sends (broadcasts,
+        # parallel callbacks) reuse TLS connections instead of re-handshaking
         self.application = (
             Application.builder()
             .token(BOT_TOKEN)
             .concurrent_updates(True)
             .rate_limiter(None)
+            .request(HTTPXRequest(connection_pool_size=256, pool_timeout=30))
+            .get_updates_request(HTTPXRequest(connection_pool_size=8, pool_timeout=30))
             .build()
         )
 
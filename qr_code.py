@@ -4,16 +4,42 @@ import io
 from typing import Optional, Union
 
 class QRCodeManager:
+    # Payment texts built once at class definition; the amount is the only
+    # per-call variation
+    _MSG_NO_AMOUNT = (
+        "💳 **Payment Instructions**\n\n"
+        "🧾 Scan the QR code below to pay\n"
+        "📸 Send payment screenshot after completing\n"
+        "📞 Contact Owner: @Abdul20298\n\n"
+        "⚡ Payment will be verified within 24 hours"
+    )
+    _MSG_WITH_AMOUNT = (
+        "💳 **Payment Instructions**\n\n"
+        "🧾 Scan the QR code below to pay\n"
+        "💰 Amount: {amount}\n"
+        "📸 Send payment screenshot after completing\n"
+        "📞 Contact Owner: @Abdul20298\n\n"
+        "⚡ Payment will be verified within 24 hours"
+    )
+
     def __init__(self):
         self.qr_file_path = "static/qr_payment.jpg"
-    
+        # Telegram file_id of the last uploaded QR photo; lets us resend
+        # the image without re-reading and re-uploading the file
+        self.cached_file_id: Optional[str] = None
+        # Cached result of the existence check; the file only changes
+        # through save_qr_code, so a stat per purchase is wasted work
+        self._exists_cache: Optional[bool] = None
+
     def get_qr_code_path(self) -> str:
         """Get QR code file path"""
         return self.qr_file_path
-    
+
     def qr_code_exists(self) -> bool:
-        """Check if QR code file exists"""
-        return os.path.exists(self.qr_file_path)
+        """Check if QR code file exists (cached after the first stat)"""
+        if self._exists_cache is None:
+            self._exists_cache = os.path.exists(self.qr_file_path)
+        return self._exists_cache
     
     def save_qr_code(self, file_content: bytes, file_extension: str = 'jpg') -> bool:
         """Save uploaded QR code file"""
@@ -28,6 +54,9 @@ class QRCodeManager:
                 f.write(file_content)
             
             self.qr_file_path = file_path
+            # New image invalidates the previously uploaded file_id
+            self.cached_file_id = None
+            self._exists_cache = True
             return True
         except Exception as e:
             print(f"Error saving QR code: {e}")
@@ -35,12 +64,6 @@ class QRCodeManager:
     
     def create_payment_qr_message(self, amount: Optional[str] = None) -> str:
         """Create payment message with QR code instructions"""
-        message = "💳 **Payment Instructions**\n\n"
-        message += "🧾 Scan the QR code below to pay\n"
         if amount:
-            message += f"💰 Amount: {amount}\n"
-        message += "📸 Send payment screenshot after completing\n"
-        message += "📞 Contact Owner: @Abdul20298\n\n"
-        message += "⚡ Payment will be verified within 24 hours"
-        
-        return message
+            return self._MSG_WITH_AMOUNT.format(amount=amount)
+        return self._MSG_NO_AMOUNT
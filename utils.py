@@ -1,21 +1,36 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Dict
 import re
+from config import OWNER_IDS, OWNER_USERNAMES
+
+# Frozen at import time: owner checks are O(1) hash lookups with no
+# per-call import machinery
+_OWNER_IDS = frozenset(OWNER_IDS)
+_OWNER_USERNAMES = frozenset(u.lstrip('@') for u in OWNER_USERNAMES)
+
+class AsyncDBMixin:
+    """Run blocking DatabaseManager calls in a thread pool so they don't
+    stall the asyncio event loop"""
+
+    # Shared across handler instances; DatabaseManager serializes access to
+    # its persistent connection with a lock, so worker threads are safe
+    _db_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db")
+
+    async def _db(self, fn, *args, **kwargs):
+        """Await a synchronous DB call without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_pool, partial(fn, *args, **kwargs))
 
 def create_inline_keyboard(buttons: List[List[Dict[str, str]]]) -> InlineKeyboardMarkup:
     """Create inline keyboard from button configuration"""
-    keyboard = []
-    for row in buttons:
-        keyboard_row = []
-        for button in row:
-            keyboard_row.append(InlineKeyboardButton(
-                text=button['text'],
-                callback_data=button['callback_data']
-            ))
-        keyboard.append(keyboard_row)
-    
-    return InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text=button['text'], callback_data=button['callback_data'])
+         for button in row]
+        for row in buttons
+    ])
 
 def format_user_info(user) -> str:
     """Format user information for display"""
@@ -23,17 +38,19 @@ def format_user_info(user) -> str:
     name = f"{user.first_name or ''} {user.last_name or ''}".strip()
     return f"👤 {name}\n🔗 {username}\n🆔 {user.id}"
 
+_USERNAME_RE = re.compile(r'^@?[a-zA-Z0-9_]{5,32}$')
+
 def validate_username(username: str) -> bool:
     """Validate Telegram username format"""
-    pattern = r'^@?[a-zA-Z0-9_]{5,32}$'
-    return bool(re.match(pattern, username))
+    return _USERNAME_RE.match(username) is not None
+
+# Maps each markdown special character to its escaped form; one C-level
+# pass over the string instead of 17 str.replace passes
+_MD_ESCAPE_TABLE = str.maketrans({c: '\\' + c for c in r'_*[]()~`>#+-=|{}.!'})
 
 def escape_markdown(text: str) -> str:
     """Escape markdown special characters"""
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    for char in escape_chars:
-        text = text.replace(char, f'\\{char}')
-    return text
+    return text.translate(_MD_ESCAPE_TABLE)
 
 def chunk_list(lst: list, chunk_size: int) -> List[list]:
     """Split list into chunks of specified size"""
@@ -61,7 +78,7 @@ def format_product_message(product: Dict) -> str:
 def format_admin_stats(db_manager) -> str:
     """Format admin statistics"""
     user_count = db_manager.get_user_count()
-    product_count = len(db_manager.get_all_products())
+    product_count = db_manager.get_product_count()
     
     return f"""
 📊 **Bot Statistics**
@@ -73,14 +90,12 @@ def format_admin_stats(db_manager) -> str:
 
 def is_owner(user_id: int, username: str = None) -> bool:
     """Check if user is one of the bot owners"""
-    from config import OWNER_IDS, OWNER_USERNAMES
-    
     # Check by user ID if available
-    if user_id in OWNER_IDS:
+    if user_id in _OWNER_IDS:
         return True
-    
+
     # Check by username if provided
-    if username and username.replace('@', '') in OWNER_USERNAMES:
+    if username and username.lstrip('@') in _OWNER_USERNAMES:
         return True
-    
+
     return False